@@ -1,15 +1,19 @@
 from . import tokenizer as t
 from typing import Iterable, Self
+from collections import deque
 
 class ParseError (Exception):
     def __init__ (self, msg, line, col):
-        super ().__init__ (
-            f"Line {line}, column {col}: "
-            + msg
-        )
+        super ().__init__ (msg, line, col)
+        self.msg, self.line, self.col = msg, line, col
+
+    def __str__ (self):
+        return f"Line {self.line}, column {self.col}: {self.msg}"
 
 class Node:
     """Base AST node class"""
+    __slots__ = ("line", "col", "children", "name")
+
     def __init__ (
         self, line: int, col: int,
         children: tuple[Self, ...], name: str | None = None
@@ -20,16 +24,24 @@ class Node:
         self.name = name
 
     @classmethod
-    def get (cls, tokens: list[t.Token]):
+    def get (cls, tokens: deque[t.Token]):
         """Parse a node of this type"""
         raise NotImplementedError ()
 
 class SVARA (Node):
+    # The duration is stored as a plain int rather than as
+    # a child, which would need a tuple per svara
+    __slots__ = ("duration",)
+
+    def __init__ (self, line: int, col: int, duration: int, name: str):
+        super ().__init__ (line, col, children = (), name = name)
+        self.duration = duration
+
     @classmethod
-    def get (cls, tokens: list[t.Token]):
+    def get (cls, tokens: deque[t.Token]):
         # Get the svara name
-        tok = tokens.pop (0)
-        if not isinstance (tok, t.SVARA_NAME):
+        tok = tokens.popleft ()
+        if tok.TAG != t.T_SVARA_NAME:
             raise ParseError (
                 "Expected SVARA_NAME",
                 tok.line, tok.col
@@ -37,24 +49,26 @@ class SVARA (Node):
         name = tok.word
         # Count the following commas
         duration = 1
-        while isinstance (tokens [0], t.GAP):
-            tokens.pop (0)
+        while tokens [0].TAG == t.T_GAP:
+            tokens.popleft ()
             duration += 1
 
         return cls (
             tok.line, tok.col,
-            children = (duration,), name = tok.word
+            duration = duration, name = tok.word
         )
 
     def get_duration (self) -> int:
-        return self.children [0]
+        return self.duration
 
 class GAMAKA (Node):
+    __slots__ = ()
+
     @classmethod
-    def get (cls, tokens: list[t.Token]):
+    def get (cls, tokens: deque[t.Token]):
         # Get the gamaka name
-        tok = tokens.pop (0)
-        if not isinstance (tok, t.GAMAKA_NAME):
+        tok = tokens.popleft ()
+        if tok.TAG != t.T_GAMAKA_NAME:
             raise ParseError (
                 "Expected GAMAKA_NAME",
                 tok.line, tok.col
@@ -63,7 +77,7 @@ class GAMAKA (Node):
 
         # Get the following svaras
         svaras = []
-        while isinstance (tokens [0], t.SVARA_NAME):
+        while tokens [0].TAG == t.T_SVARA_NAME:
             svaras.append (SVARA.get (tokens))
 
         return cls (
@@ -72,8 +86,10 @@ class GAMAKA (Node):
         )
 
 class LINE (Node):
+    __slots__ = ()
+
     @classmethod
-    def get (cls, tokens: list[t.Token]):
+    def get (cls, tokens: deque[t.Token]):
         line, col = tokens [0].line, tokens [0].col
         # Get the list of svaras
         svaras = LIST.get_of_type (tokens, elem_type = SVARA)
@@ -99,13 +115,15 @@ class LINE (Node):
         return self.children [1]
 
 class LIST (Node):
+    __slots__ = ()
+
     @classmethod
-    def get_of_type (cls, tokens: list[t.Token], /, elem_type: type):
+    def get_of_type (cls, tokens: deque[t.Token], /, elem_type: type):
         assert issubclass (elem_type, Node)
 
-        tok = tokens.pop (0)
+        tok = tokens.popleft ()
         line, col = tok.line, tok.col
-        if not isinstance (tok, t.LIST_START):
+        if tok.TAG != t.T_LIST_START:
             raise ParseError (
                 "Expected LIST_START",
                 line, col
@@ -113,8 +131,8 @@ class LIST (Node):
 
         elements = []
         while True:
-            if isinstance (tokens [0], t.LIST_END):
-                tokens.pop (0)
+            if tokens [0].TAG == t.T_LIST_END:
+                tokens.popleft ()
                 break
             elem = elem_type.get (tokens)
             elements.append (elem)
@@ -122,7 +140,7 @@ class LIST (Node):
         return cls (line, col, children = tuple (elements))
 
     @classmethod
-    def get_empty (cls, tokens: list[t.Token]):
+    def get_empty (cls, tokens: deque[t.Token]):
         line, col = tokens [0].line, tokens [0].col
         return cls (line, col, children = ())
 
@@ -136,8 +154,10 @@ class LIST (Node):
         return len (self.children)
 
 class SONG (Node):
+    __slots__ = ()
+
     @classmethod
-    def get (cls, tokens: list[t.Token]):
+    def get (cls, tokens: deque[t.Token]):
         line, col = tokens [0].line, tokens [0].col
         lines = LIST.get_of_type (tokens, elem_type = LINE)
         return cls (line, col, children = lines.children)
@@ -150,8 +170,17 @@ class SONG (Node):
         for line in self.children:
             yield from line.get_gamakas ()
 
-def parse (program: list[t.Token]):
-    return SONG.get (program)
+    def get_svaras_and_gamakas (self) -> Iterable[tuple[SVARA, GAMAKA]]:
+        """
+        Pair each svara with its gamaka. Cheaper than zipping
+        `get_svaras ()` and `get_gamakas ()`.
+        """
+        for line in self.children:
+            yield from zip (line.get_svaras (), line.get_gamakas ())
+
+def parse (program: Iterable[t.Token]):
+    # Tokens are consumed from the front as they are parsed
+    return SONG.get (deque (program))
 
 if __name__ == "__main__":
     from sys import stdin
@@ -13,13 +13,16 @@ time in a `TuneSegment`.
 
 from .. import parser as p
 from typing import Iterable
+from bisect import bisect_left
+from functools import cache
 
 class MusicError (Exception):
     def __init__ (self, line, col, msg):
-        super ().__init__ (
-            f"Line {line}, column {col}: "
-            + msg
-        )
+        super ().__init__ (line, col, msg)
+        self.line, self.col, self.msg = line, col, msg
+
+    def __str__ (self):
+        return f"Line {self.line}, column {self.col}: {self.msg}"
 
 SvaraIndices = (
     # The index of a svara in this tuple is the
@@ -38,29 +41,44 @@ SvaraIndices = (
     "da1", "da2",
     "ni1", "ni2",
 )
-def svara_to_rel_note (svara: p.SVARA):
-    "Find the relative note for svara `svara`"
-    sname = svara.name
+# Maps a svara name to its index in `SvaraIndices`
+SvaraOffsets = {
+    name: offset
+    for offset, name in enumerate (SvaraIndices)
+}
+# Maps a suffix on a svara name to the octave it shifts to
+OctaveSuffixes = {"+": +1, "-": -1}
+# Returned by `name_to_rel_note` for names that aren't svaras
+NotASvara = object ()
+
+@cache
+def name_to_rel_note (sname: str):
+    """
+    Find the relative note for the svara named `sname`.
+
+    Songs use only a handful of distinct svara names, so
+    results are cached.
+    """
     if sname == ",":
         return None
 
-    if sname.endswith ("+"):
-        name = svara [:-1]
-        octave = +1
-    elif sname.endswith ("-"):
-        name = svara [:-1]
-        octave = -1
-    else:
-        name = sname
-        octave = 0
-    try:
-        offset = SvaraIndices.index (name)
-    except ValueError:
+    # The last character may be an octave suffix
+    octave = OctaveSuffixes.get (sname [-1], 0)
+    name = sname [:-1] if octave else sname
+    offset = SvaraOffsets.get (name)
+    if offset is None:
+        return NotASvara
+    return offset + (octave * 12)
+
+def svara_to_rel_note (svara: p.SVARA):
+    "Find the relative note for svara `svara`"
+    rel_note = name_to_rel_note (svara.name)
+    if rel_note is NotASvara:
         raise MusicError (
             svara.line, svara.col,
-            f"Not a svara: {sname}"
+            f"Not a svara: {svara.name}"
         )
-    return offset + (octave * 12)
+    return rel_note
 
 class GamakaSampler:
     def __init__ (self, checkpoints):
@@ -68,23 +86,38 @@ class GamakaSampler:
         self.positions = sorted (checkpoints.keys ())
         assert self.positions [0] == 0
         assert self.positions [-1] == 1
+        # A sampler whose checkpoints all refer to the same
+        # param never moves away from it
+        self.is_hold = len (set (checkpoints.values ())) == 1
 
     def sample (self, t, params):
         assert t >= 0 and t <= 1
         # Find s, e such that s <= t <= e
-        s, e = None, None
-        for i in range (len (self.positions) - 1):
-            s, e = self.positions [i], self.positions [i + 1]
-            assert s <= t
-            if e >= t:
-                break
-        assert s is not None, e is not None
+        i = max (bisect_left (self.positions, t), 1)
+        s, e = self.positions [i - 1], self.positions [i]
         low, high = self.checkpoints [s], self.checkpoints [e]
         return (
             (params [high] - params [low])
             * t
         )
 
+    def sample_all (self, ts, params):
+        """
+        Sample at each point in `ts`, which must be in
+        ascending order. Equivalent to calling `sample` on each
+        point, but finds each s, e in a single walk.
+        """
+        positions = zip (self.positions, self.positions [1:])
+        s, e = next (positions)
+        res = []
+        for t in ts:
+            assert t >= 0 and t <= 1
+            while e < t:
+                s, e = next (positions)
+            low, high = self.checkpoints [s], self.checkpoints [e]
+            res.append ((params [high] - params [low]) * t)
+        return res
+
     def __call__ (self, t, params):
         return self.sample (t, params)
 
@@ -120,13 +153,21 @@ class TuneSegment:
     `TuneSegment`s are consumed by a backend when
     rendering music.
     """
+    __slots__ = ("start_svara", "end_svara", "gamaka", "duration")
+
     def __init__ (self, start_svara, end_svara, gamaka, duration):
-        self.gamaka = gamaka
         self.start_svara = start_svara
         self.end_svara = end_svara
         self.gamaka = gamaka
         self.duration = duration
 
+    def is_held (self) -> bool:
+        "Whether the pitch stays at `start_svara` throughout"
+        return (
+            self.start_svara == self.end_svara
+            or self.gamaka.is_hold
+        )
+
     def __repr__ (self):
         cons = self.__class__.__name__
         start = repr (self.start_svara)
@@ -135,24 +176,20 @@ class TuneSegment:
         return f'{cons}({start}, {end}, {gamaka})'
 
 def song_to_tunesegments (song: p.SONG) -> Iterable[TuneSegment]:
-    svaras = (*song.get_svaras (),)
-    s_names = [
-        svara_to_rel_note (s)
-        for s in svaras
-    ]
-    s_names.append (s_names [-1])
-    durations = tuple (
-        s.get_duration ()
-        for s in svaras
-    )
-    g_samplers = tuple (
-        gamaka_to_sampler (g)
-        for g in song.get_gamakas ()
-    )
-
-    for i in range (len (svaras)):
-        start = s_names [i]
-        end = s_names [i + 1]
-        sampler = g_samplers [i]
-        duration = durations [i]
-        yield TuneSegment (start, end, sampler, duration)
+    # Each segment ends at the svara following its own, so
+    # it is yielded one svara late. The last segment ends
+    # where it starts.
+    segment = None
+    for svara, gamaka in song.get_svaras_and_gamakas ():
+        note = svara_to_rel_note (svara)
+        if segment is not None:
+            if note is None:
+                note = segment.start_svara
+            segment.end_svara = note
+            yield segment
+        segment = TuneSegment (
+            note, note,
+            gamaka_to_sampler (gamaka), svara.get_duration ()
+        )
+    if segment is not None:
+        yield segment
@@ -1,8 +1,11 @@
 from typing import Iterable
+from itertools import groupby
+from functools import lru_cache
 from mido import Message, MidiTrack, MidiFile
+from mido.frozen import freeze_message
 
 from .. import parser as p
-from .common import TuneSegment
+from .common import TuneSegment, GamakaSampler
 
 
 class MidiMessenger:
@@ -14,6 +17,7 @@ class MidiMessenger:
         self.shruti = shruti
         self.gap_ticks = 0
         self.current_note = None
+        self.current_bend = None
 
     def advance (self, ticks: int):
         """
@@ -35,13 +39,15 @@ class MidiMessenger:
         self.gap_ticks = 0
         return msg
 
-    def stop_note (self):
+    def stop_note (self) -> Iterable[Message]:
         """
-        Stop playing the current note.
+        Stop playing the current note, if any.
         """
-        res = self.make_message ("note_off", self.current_note)
+        if self.current_note is not None:
+            yield self.make_message (
+                "note_off", note = self.current_note
+            )
         self.current_note = None
-        return res
 
     def play_note (self, rel_note: int) -> Iterable[Message]:
         """
@@ -61,51 +67,92 @@ class MidiMessenger:
                 )
         self.current_note = new_note
 
-    def bend_pitch (self, rel_offset) -> Message:
-        bend = (rel_offset / 12) * 8192
-        return self.make_message (
-            "pitchwheel", pitch = int (bend)
-        )
+    def set_pitchwheel (self, bend: int) -> Iterable[Message]:
+        """
+        Return a MIDI message that moves the pitch wheel to
+        `bend` (a raw pitch wheel value). Nothing is emitted
+        if the pitch wheel is already at that position.
+        """
+        if self.current_bend != bend:
+            yield self.make_message (
+                "pitchwheel", pitch = bend
+            )
+        self.current_bend = bend
+
+def _pitchbend_range_messages () -> tuple[Message, ...]:
+    cc = Message ("control_change")
+    pb_1 = cc.copy (control = 0x64)
+    pb_2 = cc.copy (control = 0x65)
+    return tuple (map (freeze_message, (
+        # "This is a pitchbend sensitivity change sequence"
+        pb_1.copy (value = 0x0),
+        pb_2.copy (value = 0x0),
+        # "Set sensitivity: coarse = 12 semitones"
+        cc.copy (control = 0x06, value = 12),
+        # "Set sensitivity: fine = 0 cents"
+        cc.copy (control = 0x26, value = 0),
+        # "Pitchbend change sequence ends here"
+        pb_1.copy (value = 0x7F),
+        pb_2.copy (value = 0x7f),
+    )))
+# These are built once and the same objects are put in every
+# rendered track. `Message`s can be modified in place, so they
+# are frozen: otherwise editing one track (e.g. its first
+# message's `time`) would change every later render as well.
+PitchbendRangeMessages = _pitchbend_range_messages ()
 
 def set_pitchbend_range () -> Iterable[Message]:
     """
     Emit messages to set the pitch bend range to +-1 octave.
     """
-    cc = Message ("control_change")
-    pb_1 = cc.copy (control = 0x64)
-    pb_2 = cc.copy (control = 0x65)
-    # "This is a pitchbend sensitivity change sequence"
-    yield pb_1.copy (value = 0x0)
-    yield pb_2.copy (value = 0x0)
-    # "Set sensitivity: coarse = 12 semitones"
-    yield cc.copy (control = 0x06, value = 12)
-    # "Set sensitivity: fine = 0 cents"
-    yield cc.copy (control = 0x26, value = 0)
-    # "Pitchbend change sequence ends here"
-    yield pb_1.copy (value = 0x7F)
-    yield pb_2.copy (value = 0x7f)
+    yield from PitchbendRangeMessages
+
+@lru_cache (maxsize = 1024)
+def pitch_bends (
+    gamaka: GamakaSampler, start: int, end: int, dur_ticks: int
+) -> tuple[tuple[int, int], ...]:
+    """
+    Compute the pitch wheel values over a segment that is
+    `dur_ticks` ticks long, with gamaka `gamaka` going from
+    `start` to `end`.
+
+    Consecutive ticks often share a pitch wheel value, so
+    the result is given as `(bend, ticks)` pairs for each run
+    of them. Songs repeat the same segments a lot, so
+    results are cached.
+    """
+    offsets = gamaka.sample_all (
+        [(tick / dur_ticks) ** 5 for tick in range (dur_ticks)],
+        (start, end)
+    )
+    bends = groupby (int ((offset / 12) * 8192) for offset in offsets)
+    return tuple ((bend, sum (1 for _ in run)) for bend, run in bends)
 
 def render (segments: Iterable[TuneSegment], outfile: str):
     messenger = MidiMessenger (shruti = 64)
 
-    msgs = []
-    msgs.append (Message ("program_change", program = 40))
-    msgs.extend (set_pitchbend_range ())
+    # Messages are written straight to the file's track
+    file = MidiFile ()
+    track = MidiTrack ()
+    file.tracks.append (track)
+
+    track.append (Message ("program_change", program = 40))
+    track.extend (set_pitchbend_range ())
     for seg in segments:
-        msgs.extend (messenger.play_note (seg.start_svara))
+        track.extend (messenger.play_note (seg.start_svara))
         #messenger.advance (ticks = 200)
         dur_ticks = 200 * seg.duration
-        for tick in range (dur_ticks):
-            t = (tick / dur_ticks) ** 5
-            offset = seg.gamaka.sample (
-                t, (seg.start_svara, seg.end_svara)
-            )
-            msgs.append (messenger.bend_pitch (offset))
-            messenger.advance (ticks = 1)
-    msgs.append (messenger.stop_note ())
+        if seg.is_held ():
+            # No need to sample anything
+            track.extend (messenger.set_pitchwheel (0))
+            messenger.advance (ticks = dur_ticks)
+            continue
+        bends = pitch_bends (
+            seg.gamaka, seg.start_svara, seg.end_svara, dur_ticks
+        )
+        for bend, ticks in bends:
+            track.extend (messenger.set_pitchwheel (bend))
+            messenger.advance (ticks = ticks)
+    track.extend (messenger.stop_note ())
 
-    # Write the messages to a track in a MIDI file
-    file = MidiFile ()
-    track = MidiTrack (msgs)
-    file.tracks.append (track)
     file.save (outfile)
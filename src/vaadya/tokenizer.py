@@ -1,15 +1,30 @@
 import re
+from bisect import bisect_right
 
 class TokenError (Exception):
     """Raised when a token is invalid"""
     def __init__ (self, word: str, line: int, col: int):
-        super ().__init__ (
-            f"Line {line}, column {col}: "
-            f"Invalid token: {word}"
+        super ().__init__ (word, line, col)
+        self.word, self.line, self.col = word, line, col
+
+    def __str__ (self):
+        return (
+            f"Line {self.line}, column {self.col}: "
+            f"Invalid token: {self.word}"
         )
 
+# Integer tags for each token type. Checking a token's `TAG`
+# is cheaper than an `isinstance` check
+(
+    T_LIST_START, T_LIST_END, T_SVARA_NAME,
+    T_GAP, T_GAMAKA_NAME, T_GAMAKA_END,
+) = range (6)
+
 class Token:
     """Base token class"""
+    __slots__ = ("word", "line", "col")
+    TAG = -1
+
     def __init__ (self, word, line, col):
         self.word = word
         self.line = line
@@ -22,52 +37,69 @@ class Token:
         return f"{toktype}({data}, line={line}, col={col})"
 
 class LIST_START (Token):
-    pass
+    __slots__ = ()
+    TAG = T_LIST_START
 class LIST_END (Token):
-    pass
+    __slots__ = ()
+    TAG = T_LIST_END
 class SVARA_NAME (Token):
-    pass
+    __slots__ = ()
+    TAG = T_SVARA_NAME
 class GAP (Token):
-    pass
+    __slots__ = ()
+    TAG = T_GAP
 class GAMAKA_NAME (Token):
-    pass
+    __slots__ = ()
+    TAG = T_GAMAKA_NAME
 class GAMAKA_END (Token):
-    pass
+    __slots__ = ()
+    TAG = T_GAMAKA_END
 
+# `\S` is used rather than `.` so that these patterns also
+# work when scanning a whole program, where they must not run
+# past the end of a word
 Pattern_TokenType = (
     ("{", LIST_START),
     ("}", LIST_END),
-    (r"[a-zA-Z].*", SVARA_NAME),
+    (r"[a-zA-Z]\S*", SVARA_NAME),
     (r",", GAP),
-    (r":.*", GAMAKA_NAME),
+    (r":\S*", GAMAKA_NAME),
 )
+# All of the above patterns, combined into one regex. The
+# name of the group that matched gives the token type.
+Token_Re = re.compile ("|".join (
+    f"(?P<{token_ctor.__name__}>{pattern})"
+    for pattern, token_ctor in Pattern_TokenType
+))
+Token_Types = {
+    token_ctor.__name__: token_ctor
+    for _, token_ctor in Pattern_TokenType
+}
 def make_token (word: str, line: int, col: int) -> Token:
-    for pattern, token_ctor in Pattern_TokenType:
-        if re.fullmatch (pattern, word):
-            return token_ctor (word, line, col)
-
-    # We couldn't match this against a valid pattern
-    raise TokenError (word, line, col)
+    m = Token_Re.fullmatch (word)
+    if m is None:
+        # We couldn't match this against a valid pattern
+        raise TokenError (word, line, col)
+    return Token_Types [m.lastgroup] (word, line, col)
 
+# Like `Token_Re`, but finds and classifies words in one go.
+# A token must be followed by whitespace (or the end of the
+# program); any other word is matched as `INVALID`.
+Scan_Re = re.compile (
+    f"(?:{Token_Re.pattern})(?!\\S)|(?P<INVALID>\\S+)"
+)
 def tokenize (program):
-    line, col = 1, 0
-    wordl = []
-    for char in program:
-        col += 1
-        if char.isspace ():
-            # 1. A whitespace ends a token
-            if wordl:
-                word = "".join (wordl)
-                # Note that `col` is where the token _ends_,
-                # not starts
-                yield make_token (word, line, col - len (word))
-                wordl = []
-            if char == "\n":
-                # 2. A newline starts... a new line
-                line += 1; col = 0
-        else:
-            # 3. Anything else is part of a token
-            wordl.append (char)
+    # Positions of all newlines, used to find the line and
+    # column at which a word starts
+    newlines = [m.start () for m in re.finditer ("\n", program)]
+    for m in Scan_Re.finditer (program):
+        start = m.start ()
+        n_lines = bisect_right (newlines, start)
+        line_start = newlines [n_lines - 1] if n_lines else -1
+        line, col = n_lines + 1, start - line_start
+        if m.lastgroup == "INVALID":
+            raise TokenError (m.group (), line, col)
+        yield Token_Types [m.lastgroup] (m.group (), line, col)
 
 if __name__ == "__main__":
     from sys import stdin
@@ -0,0 +1,23 @@
+import pytest
+
+from vaadya import tokenizer as t, parser as p
+
+def parse (program):
+    return p.parse (t.tokenize (program))
+
+def test_durations ():
+    song = parse ("{ { sa , , ri2 } { : : } }")
+    assert [
+        (s.name, s.get_duration ()) for s in song.get_svaras ()
+    ] == [("sa", 3), ("ri2", 1)]
+
+def test_parse_error ():
+    with pytest.raises (p.ParseError) as info:
+        parse ("{ { sa } { } }")
+    err = info.value
+    msg = (
+        "Expected equal numbers of SVARAs and GAMAKAs, "
+        "got 1 SVARAs and 0 GAMAKAs"
+    )
+    assert str (err) == f"Line 1, column 3: {msg}"
+    assert err.args == (msg, 1, 3)
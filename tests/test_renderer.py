@@ -0,0 +1,48 @@
+import pytest
+from mido import MidiFile
+
+from vaadya import tokenizer as t, parser as p
+from vaadya.renderer import common as c, midi
+
+def segments (program):
+    return [*c.song_to_tunesegments (p.parse (t.tokenize (program)))]
+
+def test_octave_suffix ():
+    segs = segments ("{ { sa+ ni2- pa } { : : : } }")
+    assert [(s.start_svara, s.end_svara) for s in segs] == [
+        (12, -1), (-1, 7), (7, 7)
+    ]
+
+def test_music_error ():
+    with pytest.raises (c.MusicError) as info:
+        segments ("{ { sa foo } { : : } }")
+    err = info.value
+    assert str (err) == "Line 1, column 8: Not a svara: foo"
+    assert err.args == (1, 8, "Not a svara: foo")
+
+def test_note_off (tmp_path):
+    out = tmp_path / "out.mid"
+    midi.render (segments ("{ { sa ri2 } { :/ : } }"), str (out))
+    notes = [
+        (msg.type, msg.note)
+        for msg in MidiFile (out).tracks [0]
+        if msg.type in ("note_on", "note_off")
+    ]
+    assert notes == [
+        ("note_on", 64), ("note_on", 66),
+        ("note_off", 64), ("note_off", 66),
+    ]
+
+@pytest.mark.parametrize ("program", ["{ }", "{ { } { } }"])
+def test_empty_song (tmp_path, program):
+    out = tmp_path / "out.mid"
+    midi.render (segments (program), str (out))
+    assert not any (
+        msg.type == "note_off" for msg in MidiFile (out).tracks [0]
+    )
+
+def test_pitchbend_range_shared ():
+    # Editing one rendered track must not leak into later renders
+    msg = next (midi.set_pitchbend_range ())
+    with pytest.raises (ValueError):
+        msg.time = 500
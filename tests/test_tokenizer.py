@@ -0,0 +1,23 @@
+import pytest
+
+from vaadya import tokenizer as t
+
+def test_trailing_word ():
+    # The last word needs no whitespace after it
+    toks = [*t.tokenize ("{ sa")]
+    assert [tok.word for tok in toks] == ["{", "sa"]
+    assert toks [-1].TAG == t.T_SVARA_NAME
+
+def test_positions ():
+    toks = [*t.tokenize ("{\n  sa , }")]
+    assert [(tok.line, tok.col) for tok in toks] == [
+        (1, 1), (2, 3), (2, 6), (2, 8)
+    ]
+
+def test_token_error ():
+    with pytest.raises (t.TokenError) as info:
+        [*t.tokenize ("sa\n 1b")]
+    err = info.value
+    assert str (err) == "Line 2, column 2: Invalid token: 1b"
+    assert err.args == ("1b", 2, 2)
+    assert (err.word, err.line, err.col) == ("1b", 2, 2)